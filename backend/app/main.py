@@ -1,19 +1,25 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, validator
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, validator
+from typing import Annotated, Dict, Any, AsyncIterator, Hashable, List, Literal, Optional, Tuple
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 import base64
 import asyncio
-import json
+import functools
+import hashlib
+import io
 import re
 import os
-import traceback
+import time
+import httpx
+import orjson
 from openai import AsyncOpenAI
 from playwright.async_api import async_playwright
+from PIL import Image
 import logging
 from dotenv import load_dotenv
-import os
 
 load_dotenv()  
 
@@ -21,7 +27,33 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="AI Website Cloner", version="1.0.0")
+_iso_cache = (0, "")
+
+def now_iso() -> str:
+    """Current UTC time in ISO 8601, formatted at most once per second"""
+    global _iso_cache
+    t = int(time.time())
+    if t != _iso_cache[0]:
+        _iso_cache = (t, time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t)))
+    return _iso_cache[1]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start shared browser and HTTP clients on startup and tear them down on shutdown"""
+    await scraper.startup()
+    await cloner.startup()
+    try:
+        yield
+    finally:
+        await cloner.shutdown()
+        await scraper.shutdown()
+
+app = FastAPI(
+    title="AI Website Cloner",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,21 +63,95 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize OpenAI client
-openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
 # Supported models
 SUPPORTED_MODELS = ["gpt-4o", "gpt-4o-mini"]
 
+# Number of pre-warmed browser contexts; also caps concurrent scrapes
+CONTEXT_POOL_SIZE = int(os.getenv("CONTEXT_POOL_SIZE", "4"))
+DEFAULT_VIEWPORT = {"width": 1280, "height": 720}
+
+# Maximum concurrent OpenAI requests and how long each may take
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+
+# Account rate limits, enforced client-side so bursts queue here instead of hitting 429s.
+# Opt-in: set them to your tier's limits; unset or 0 leaves requests unthrottled
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "0"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "0"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+MAX_OUTPUT_TOKENS = 4000
+# Rough token cost of one high-detail screenshot after OpenAI's own resize
+VISION_IMAGE_TOKENS = 1105
+
+# Generated clones kept in memory keyed by their inputs, and for how long (seconds)
+CLONE_CACHE_SIZE = int(os.getenv("CLONE_CACHE_SIZE", "128"))
+CLONE_CACHE_TTL = float(os.getenv("CLONE_CACHE_TTL", "86400"))
+
+# Most operations accepted in one batch request
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "20"))
+
+# Structure flags reported to the model as layout features
+LAYOUT_FEATURES = (("navigation", "Navigation"), ("footer", "Footer"), ("sidebar", "Sidebar"))
+
+# Markdown code fences the model sometimes wraps its HTML in
+_HTML_FENCE_RE = re.compile(r'```html(.*?)```', re.DOTALL)
+_FENCE_RE = re.compile(r'```(.*?)```', re.DOTALL)
+# An opening fence whose closing one was cut off by max_tokens
+_OPEN_FENCE_RE = re.compile(r'\s*```(?:html)?(.*)', re.DOTALL)
+
+# High-detail vision input is scaled to fit 2048px, then its short side to 768px;
+# anything larger is uploaded only to be thrown away
+MAX_SCREENSHOT_SIDE = 2048
+MAX_SCREENSHOT_SHORT_SIDE = 768
+
+# Scrape results reused for identical requests, and for how long (seconds)
+SCRAPE_CACHE_SIZE = int(os.getenv("SCRAPE_CACHE_SIZE", "64"))
+SCRAPE_CACHE_TTL = float(os.getenv("SCRAPE_CACHE_TTL", "600"))
+
+# Cache-Control for responses that rarely change and for scrape results
+STATIC_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+SCRAPE_CACHE_CONTROL = f"private, max-age={int(SCRAPE_CACHE_TTL)}"
+
+# Number of recent screenshots kept for GET /screenshot/{id}
+SCREENSHOT_CACHE_SIZE = int(os.getenv("SCREENSHOT_CACHE_SIZE", "32"))
+
 class ScrapeRequest(BaseModel):
     url: str
     capture_screenshot: bool = True
+    full_page_screenshot: bool = True
+    screenshot_format: Literal["jpeg", "png"] = "jpeg"
     viewport_width: int = 1280
     viewport_height: int = 720
     wait_time: int = 8000
 
-class CloneRequest(BaseModel):
-    scraped_data: Dict[str, Any]
+class StructureData(BaseModel):
+    h1: str = ""
+    h2: str = ""
+    navigation: bool = False
+    footer: bool = False
+    sidebar: bool = False
+    element_count: int = 0
+
+class ImageData(BaseModel):
+    src: str = ""
+    alt: str = ""
+    width: int = 0
+    height: int = 0
+
+class AssetsData(BaseModel):
+    images: List[ImageData] = []
+
+class ScrapedData(BaseModel):
+    """The parts of a /scrape result the cloner reads; other fields are ignored"""
+    url: str = "N/A"
+    title: str = "N/A"
+    screenshot: Optional[str] = None
+    screenshot_format: Literal["jpeg", "png"] = "png"
+    screenshot_id: Optional[str] = None
+    structure: StructureData = StructureData()
+    assets: AssetsData = AssetsData()
+
+class CloneOptions(BaseModel):
     model: str = "gpt-4o"
     include_responsive: bool = True
     include_interactions: bool = True
@@ -56,45 +162,154 @@ class CloneRequest(BaseModel):
             return "gpt-4o"
         return v
 
+class CloneRequest(CloneOptions):
+    scraped_data: ScrapedData
+
+class ScrapeAndCloneRequest(ScrapeRequest, CloneOptions):
+    pass
+
+class BatchOperation(BaseModel):
+    id: str
+    method: Literal["scrape", "clone"]
+    body: Dict[str, Any]
+
+class BatchRequest(BaseModel):
+    requests: List[BatchOperation] = Field(max_length=MAX_BATCH_SIZE)
+
+class LRUCache:
+    """Size-bounded in-memory cache that evicts the least recently used entry.
+    Entries also expire after ``ttl`` seconds when one is given."""
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value, or None on a miss"""
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return None
+        expires_at, value = self._data[key]
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+class RateLimiter:
+    """Async token bucket that allows ``rate`` units per ``period`` seconds"""
+    def __init__(self, rate: float, period: float = 60.0):
+        self.capacity = rate
+        self._tokens = rate
+        self._refill_rate = rate / period
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1) -> None:
+        """Wait until ``amount`` units are available, then consume them"""
+        amount = min(amount, self.capacity)
+        # Holding the lock while sleeping keeps waiters in FIFO order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._refill_rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self._refill_rate)
+
 class WebScraper:
-    async def scrape_website(self, request: ScrapeRequest) -> Dict[str, Any]:
+    def __init__(self):
+        self._playwright = None
+        self.browser = None
+        self._context_pool: asyncio.Queue = asyncio.Queue()
+        self._screenshots = LRUCache(SCREENSHOT_CACHE_SIZE)
+        self._cache = LRUCache(SCRAPE_CACHE_SIZE, ttl=SCRAPE_CACHE_TTL)
+
+    async def startup(self):
+        """Launch a single Chromium instance shared by all scrapes"""
+        self._playwright = await async_playwright().start()
+        self.browser = await self._playwright.chromium.launch(
+            headless=True,
+            args=["--disable-dev-shm-usage", "--disable-gpu"]
+        )
+        for _ in range(CONTEXT_POOL_SIZE):
+            context = await self.browser.new_context(viewport=DEFAULT_VIEWPORT)
+            self._context_pool.put_nowait(context)
+        logger.info("Browser launched with %d pooled contexts", CONTEXT_POOL_SIZE)
+
+    async def shutdown(self):
+        """Close the shared browser and stop Playwright"""
+        while not self._context_pool.empty():
+            await self._context_pool.get_nowait().close()
+        if self.browser:
+            await self.browser.close()
+            self.browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def scrape_website(self, request: ScrapeRequest, use_cache: bool = True) -> Dict[str, Any]:
+        cache_key = self._cache_key(request)
+        if use_cache:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.info("Scrape cache hit")
+                # The screenshot store is smaller than the scrape cache, so restore the id's bytes
+                screenshot_id = cached["screenshot_id"]
+                if screenshot_id and self._screenshots.get(screenshot_id) is None:
+                    self._screenshots.set(
+                        screenshot_id, (base64.b64decode(cached["screenshot"]), cached["screenshot_format"])
+                    )
+                return cached
+
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                context = await browser.new_context(
-                    viewport={"width": request.viewport_width, "height": request.viewport_height}
-                )
+            if not self.browser:
+                raise RuntimeError("Browser not initialized")
+
+            context = await self._context_pool.get()
+            page = None
+            try:
                 page = await context.new_page()
-                
-                logger.info(f"Loading URL: {request.url}")
+                viewport = {"width": request.viewport_width, "height": request.viewport_height}
+                if viewport != DEFAULT_VIEWPORT:
+                    await page.set_viewport_size(viewport)
+            
+                logger.info("Loading URL: %s", request.url)
                 await page.goto(request.url, wait_until='networkidle', timeout=30000)
                 await page.wait_for_timeout(request.wait_time)
+            
+                # Page data and screenshot are independent, so fetch them concurrently
+                page_data, screenshot_bytes = await asyncio.gather(
+                    self._extract_page_data(page),
+                    self._capture_screenshot(page, request)
+                )
+                page_data_complete = page_data is not None
+                if not page_data_complete:
+                    page_data = self._empty_page_data(page)
+                title, final_url = page_data["title"], page_data["url"]
+                structure_data, images = page_data["structure"], page_data["images"]
                 
-                # Get basic page info
-                title = await page.title()
-                final_url = page.url
-                
-                # Extract page structure
-                structure_data = await self._extract_structure(page)
-                
-                # Capture screenshot
-                screenshot_b64 = None
-                if request.capture_screenshot:
-                    try:
-                        screenshot_buffer = await page.screenshot(full_page=True, type='png')
-                        screenshot_b64 = base64.b64encode(screenshot_buffer).decode('utf-8')
-                    except Exception as e:
-                        logger.warning(f"Screenshot failed: {e}")
-                
-                # Get images
-                images = await self._extract_images(page)
-                
-                await browser.close()
-                
-                return {
+                screenshot_b64 = screenshot_id = None
+                if screenshot_bytes:
+                    screenshot_id = hashlib.sha256(screenshot_bytes).hexdigest()
+                    self._screenshots.set(screenshot_id, (screenshot_bytes, request.screenshot_format))
+                    screenshot_b64 = base64.b64encode(screenshot_bytes).decode('ascii')
+            
+                result = {
                     "url": final_url,
                     "title": title,
                     "screenshot": screenshot_b64,
+                    "screenshot_format": request.screenshot_format,
+                    "screenshot_id": screenshot_id,
                     "structure": structure_data,
                     "assets": {"images": images},
                     "stats": {
@@ -103,107 +318,372 @@ class WebScraper:
                         "css_rules": 0,  # Simplified
                         "dom_elements": structure_data.get("element_count", 0)
                     },
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": now_iso(),
                     "status": "success"
                 }
-                
+                # Don't serve a failed screenshot or evaluate from cache for the whole TTL
+                if page_data_complete and (screenshot_bytes or not request.capture_screenshot):
+                    self._cache.set(cache_key, result)
+                return result
+            finally:
+                await self._release_context(context, page)
+
         except Exception as e:
-            logger.error(f"Scraping failed: {str(e)}")
+            logger.exception("Scraping failed: %s", e)
             raise HTTPException(status_code=500, detail=f"Scraping failed: {str(e)}")
     
-    async def _extract_structure(self, page):
-        """Extract page structure information"""
+    @staticmethod
+    def _cache_key(request: ScrapeRequest) -> tuple:
+        """Every request field that affects the scrape result"""
+        return (
+            request.url, request.viewport_width, request.viewport_height, request.wait_time,
+            request.capture_screenshot, request.full_page_screenshot, request.screenshot_format
+        )
+
+    def get_screenshot(self, screenshot_id: str) -> Optional[tuple]:
+        """Return (bytes, format) for a recently captured screenshot, or None"""
+        return self._screenshots.get(screenshot_id)
+
+    async def _release_context(self, context, page):
+        """Reset a borrowed context and return it to the pool, replacing it if broken"""
         try:
-            return await page.evaluate("""
-                () => {
-                    return {
-                        h1: document.querySelector('h1')?.textContent?.trim() || '',
-                        h2: document.querySelector('h2')?.textContent?.trim() || '',
-                        navigation: !!document.querySelector('nav, .nav, .navbar'),
-                        footer: !!document.querySelector('footer, .footer'),
-                        sidebar: !!document.querySelector('aside, .sidebar'),
-                        element_count: document.querySelectorAll('*').length
-                    };
-                }
-            """)
+            if page:
+                await page.close()
+            await context.clear_cookies()
+        except Exception as e:
+            logger.warning("Replacing broken browser context: %s", e)
+            try:
+                await context.close()
+                context = await self.browser.new_context(viewport=DEFAULT_VIEWPORT)
+            except Exception as e:
+                logger.warning("Browser context replacement failed: %s", e)
+        # Always hand a context back, otherwise the pool would shrink until scrapes deadlock
+        self._context_pool.put_nowait(context)
+
+    async def _capture_screenshot(self, page, request: ScrapeRequest) -> Optional[bytes]:
+        """Capture a screenshot, or None if disabled or failed"""
+        if not request.capture_screenshot:
+            return None
+        try:
+            screenshot_options = {'full_page': request.full_page_screenshot, 'type': request.screenshot_format}
+            if request.screenshot_format == 'jpeg':
+                screenshot_options['quality'] = 80
+            screenshot_buffer = await page.screenshot(**screenshot_options)
+            # Pillow work is CPU-bound, keep it off the event loop
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self._downscale_screenshot, screenshot_buffer, request.screenshot_format
+            )
         except Exception as e:
-            logger.warning(f"Structure extraction failed: {e}")
-            return {"h1": "", "h2": "", "navigation": False, "footer": False, "sidebar": False, "element_count": 0}
+            logger.warning("Screenshot failed: %s", e)
+            return None
 
-    async def _extract_images(self, page):
-        """Extract image information"""
+    @staticmethod
+    def _downscale_screenshot(screenshot_buffer: bytes, screenshot_format: str) -> bytes:
+        """Downscale a screenshot to the size the vision model actually sees"""
+        # Image.open only parses the header, so this check is cheap
+        img = Image.open(io.BytesIO(screenshot_buffer))
+        width, height = img.size
+        scale = min(1.0, MAX_SCREENSHOT_SIDE / max(width, height), MAX_SCREENSHOT_SHORT_SIDE / min(width, height))
+        if scale >= 1.0:
+            return screenshot_buffer
+        img.thumbnail((round(width * scale), round(height * scale)), Image.Resampling.LANCZOS)
+        buf = io.BytesIO()
+        if screenshot_format == 'jpeg':
+            img.save(buf, 'JPEG', quality=80)
+        else:
+            img.save(buf, 'PNG')
+        return buf.getvalue()
+
+    async def _extract_page_data(self, page):
+        """Extract title, URL, structure and image information in a single evaluate, or None on failure"""
         try:
             return await page.evaluate("""
                 () => {
-                    return Array.from(document.querySelectorAll('img')).map(img => ({
-                        src: img.src,
-                        alt: img.alt || '',
-                        width: img.naturalWidth || img.width || 0,
-                        height: img.naturalHeight || img.height || 0
-                    })).slice(0, 20);
+                    const images = [];
+                    for (const img of document.images) {
+                        // Inline data: images would ship their whole payload; keep only the media-type header
+                        const src = img.src.startsWith('data:') ? img.src.slice(0, img.src.indexOf(',') + 1) : img.src;
+                        images.push({
+                            src,
+                            alt: img.alt || '',
+                            width: img.naturalWidth || img.width || 0,
+                            height: img.naturalHeight || img.height || 0
+                        });
+                        if (images.length >= 20) break;
+                    }
+                    return {
+                        title: document.title,
+                        url: location.href,
+                        structure: {
+                            h1: document.querySelector('h1')?.textContent?.trim() || '',
+                            h2: document.querySelector('h2')?.textContent?.trim() || '',
+                            navigation: !!(document.getElementsByTagName('nav')[0] || document.getElementsByClassName('nav')[0] || document.getElementsByClassName('navbar')[0]),
+                            footer: !!(document.getElementsByTagName('footer')[0] || document.getElementsByClassName('footer')[0]),
+                            sidebar: !!(document.getElementsByTagName('aside')[0] || document.getElementsByClassName('sidebar')[0]),
+                            element_count: document.getElementsByTagName('*').length
+                        },
+                        images
+                    };
                 }
             """)
         except Exception as e:
-            logger.warning(f"Image extraction failed: {e}")
-            return []
+            logger.warning("Page data extraction failed: %s", e)
+            return None
+
+    @staticmethod
+    def _empty_page_data(page) -> Dict[str, Any]:
+        """Fallback page data when the evaluate fails; page.url needs no CDP round-trip"""
+        return {
+            "title": "",
+            "url": page.url,
+            "structure": {"h1": "", "h2": "", "navigation": False, "footer": False, "sidebar": False, "element_count": 0},
+            "images": []
+        }
 
 class LLMCloner:
     def __init__(self):
-        self.openai_client = openai_client
+        self.openai_client = None
+        self._http_client = None
+        self._semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+        self._request_limiter = RateLimiter(OPENAI_RPM) if OPENAI_RPM > 0 else None
+        self._token_limiter = RateLimiter(OPENAI_TPM) if OPENAI_TPM > 0 else None
+        self._cache = LRUCache(CLONE_CACHE_SIZE, ttl=CLONE_CACHE_TTL)
+        # Per-key lock and the number of callers holding or waiting on it
+        self._key_locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+
+    async def startup(self):
+        """Create the OpenAI client on a shared keep-alive connection pool"""
+        # Keep a warm connection for every in-flight slot allowed by the semaphore
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_CONCURRENCY * 2,
+                max_keepalive_connections=LLM_CONCURRENCY,
+                keepalive_expiry=60
+            ),
+            timeout=httpx.Timeout(180),
+            http2=True
+        )
+        # The SDK retries 429s and 5xx responses with exponential backoff
+        self.openai_client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=self._http_client,
+            max_retries=OPENAI_MAX_RETRIES
+        )
+
+    async def shutdown(self):
+        """Close the pooled HTTP connections"""
+        if self._http_client:
+            await self._http_client.aclose()
+            self._http_client = None
+        self.openai_client = None
     
-    async def clone_website(self, scraped_data: Dict[str, Any], model: str = "gpt-4o", 
-                          include_responsive: bool = True, include_interactions: bool = True) -> str:
-        """Clone website using GPT-4 Vision"""
+    async def clone_website(self, scraped_data: ScrapedData, model: str = "gpt-4o", 
+                          include_responsive: bool = True, include_interactions: bool = True) -> Tuple[str, int]:
+        """Clone website using GPT-4 Vision, returning the HTML and the prompt context length"""
         try:
             if not self.openai_client:
                 raise HTTPException(status_code=500, detail="OpenAI client not initialized")
             
-            # Build context
-            context = self._build_context(scraped_data)
-            
-            # Create system prompt
-            system_prompt = self._create_system_prompt(include_responsive, include_interactions)
-            
-            # Prepare message content
-            message_content = [
-                {
-                    "type": "text",
-                    "text": f"{system_prompt}\n\nWebsite to recreate:\n{context}\n\nCreate a complete HTML file:"
-                }
-            ]
-            
-            # Add screenshot if available
-            if scraped_data.get("screenshot"):
-                message_content.append({
-                    "type": "image_url",
-                    "image_url": {
-                        "url": f"data:image/png;base64,{scraped_data['screenshot']}",
-                        "detail": "high"
-                    }
-                })
+            context = self._select_context(scraped_data)
             
-            # Call OpenAI API
-            response = await self.openai_client.chat.completions.create(
-                model=model,
-                messages=[{
-                    "role": "user",
-                    "content": message_content
-                }],
-                max_tokens=4000,
-                temperature=0.1
+            # Identical inputs produce (near-)identical output, so skip the API call
+            cache_key = self._cache_key(
+                context, scraped_data.screenshot or "", model, include_responsive, include_interactions
             )
+            cached_html = self._cache.get(cache_key)
+            if cached_html is not None:
+                logger.info("Clone cache hit")
+                return cached_html, len(context)
             
-            html_content = response.choices[0].message.content
-            html_content = self._clean_html(html_content)
+            # Concurrent clones of the same input wait for the first call instead of repeating it
+            lock, waiters = self._key_locks.get(cache_key) or (asyncio.Lock(), 0)
+            self._key_locks[cache_key] = (lock, waiters + 1)
+            try:
+                async with lock:
+                    cached_html = self._cache.get(cache_key)
+                    if cached_html is not None:
+                        return cached_html, len(context)
+                    html_content = await self._generate_html(
+                        scraped_data, context, model, include_responsive, include_interactions
+                    )
+                    self._cache.set(cache_key, html_content)
+            finally:
+                # Drop the lock only once nobody is waiting, or a failed call would let two callers through
+                lock, waiters = self._key_locks[cache_key]
+                if waiters > 1:
+                    self._key_locks[cache_key] = (lock, waiters - 1)
+                else:
+                    del self._key_locks[cache_key]
             
-            return html_content
+            return html_content, len(context)
             
+        except HTTPException:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning("LLM cloning timed out after %ss", LLM_TIMEOUT)
+            raise HTTPException(status_code=503, detail="AI cloning timed out, please retry")
+        except Exception as e:
+            logger.exception("LLM cloning failed: %s", e)
+            raise HTTPException(status_code=500, detail=f"AI cloning failed: {str(e)}")
+    
+    async def open_clone_stream(self, scraped_data: ScrapedData, model: str = "gpt-4o",
+                                include_responsive: bool = True, include_interactions: bool = True) -> AsyncIterator[str]:
+        """Start a streamed clone; upstream failures raise here, before any response bytes are sent"""
+        if not self.openai_client:
+            raise HTTPException(status_code=500, detail="OpenAI client not initialized")
+        
+        context = self._select_context(scraped_data)
+        cache_key = self._cache_key(
+            context, scraped_data.screenshot or "", model, include_responsive, include_interactions
+        )
+        cached_html = self._cache.get(cache_key)
+        if cached_html is not None:
+            logger.info("Clone cache hit")
+            return self._replay(cached_html)
+        
+        message_content = self._build_message_content(
+            scraped_data, context, include_responsive, include_interactions
+        )
+        try:
+            # The slot stays taken until the stream finishes, so _relay_stream releases it
+            stream = await self._create_completion(message_content, model, stream=True)
+        except asyncio.TimeoutError:
+            logger.warning("LLM streaming timed out after %ss", LLM_TIMEOUT)
+            raise HTTPException(status_code=503, detail="AI cloning timed out, please retry")
         except Exception as e:
-            logger.error(f"LLM cloning failed: {str(e)}")
+            logger.exception("LLM streaming failed: %s", e)
             raise HTTPException(status_code=500, detail=f"AI cloning failed: {str(e)}")
+        
+        chunks = self._relay_stream(stream, cache_key)
+        # Enter the generator now so its cleanup runs even if the response never iterates it
+        await anext(chunks)
+        return chunks
     
-    def _create_system_prompt(self, include_responsive: bool, include_interactions: bool) -> str:
-        """Create system prompt for AI"""
+    async def _relay_stream(self, stream, cache_key: str) -> AsyncIterator[str]:
+        """Yield cleaned HTML from an open completion stream, then cache the full clone"""
+        raw_parts = []
+        
+        async def deltas() -> AsyncIterator[str]:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    raw_parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        
+        try:
+            # Closing the stream hands its connection back to the pool, also when the client disconnects
+            async with stream:
+                yield ""
+                async for part in self._clean_html_stream(deltas()):
+                    yield part
+            # Cache what /clone would have produced from the same completion
+            html_content = self._clean_html("".join(raw_parts))
+            if html_content.removeprefix("<!DOCTYPE html>").strip():
+                self._cache.set(cache_key, html_content)
+        except Exception as e:
+            # Headers are already sent, so the best we can do is log and cut the stream
+            logger.exception("LLM streaming failed: %s", e)
+            raise
+        finally:
+            self._semaphore.release()
+    
+    @staticmethod
+    async def _replay(html_content: str) -> AsyncIterator[str]:
+        yield html_content
+    
+    async def _generate_html(self, scraped_data: ScrapedData, context: str, model: str,
+                             include_responsive: bool, include_interactions: bool) -> str:
+        """Call the vision model and return the cleaned HTML"""
+        message_content = self._build_message_content(
+            scraped_data, context, include_responsive, include_interactions
+        )
+        response = await self._create_completion(message_content, model)
+        html_content = response.choices[0].message.content
+        return self._clean_html(html_content)
+
+    async def _create_completion(self, message_content: List[Dict[str, Any]], model: str, stream: bool = False):
+        """Call OpenAI, bounded so a burst of clones can't pile up upstream.
+        A returned stream keeps its semaphore slot; the caller releases it when the stream ends."""
+        await self._semaphore.acquire()
+        handed_off = False
+        try:
+            await self._acquire_rate_limits(message_content)
+            response = await asyncio.wait_for(
+                self.openai_client.chat.completions.create(
+                    model=model,
+                    messages=[{
+                        "role": "user",
+                        "content": message_content
+                    }],
+                    max_tokens=MAX_OUTPUT_TOKENS,
+                    temperature=0.1,
+                    stream=stream
+                ),
+                timeout=LLM_TIMEOUT
+            )
+            handed_off = stream
+            return response
+        finally:
+            # Also runs on cancellation, which would otherwise leak the slot for good
+            if not handed_off:
+                self._semaphore.release()
+
+    def _select_context(self, scraped_data: ScrapedData) -> str:
+        """With a screenshot attached the model reads the layout from the image"""
+        if scraped_data.screenshot:
+            return self._build_minimal_context(scraped_data)
+        return self._build_context(scraped_data)
+
+    def _build_message_content(self, scraped_data: ScrapedData, context: str,
+                               include_responsive: bool, include_interactions: bool) -> List[Dict[str, Any]]:
+        """Build the user message: prompt text plus the screenshot if available"""
+        system_prompt = self._create_system_prompt(include_responsive, include_interactions)
+        message_content = [
+            {
+                "type": "text",
+                "text": f"{system_prompt}\n\nWebsite to recreate:\n{context}\n\nCreate a complete HTML file:"
+            }
+        ]
+        if scraped_data.screenshot:
+            message_content.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": self._screenshot_data_url(scraped_data),
+                    "detail": "high"
+                }
+            })
+        return message_content
+
+    async def _acquire_rate_limits(self, message_content: List[Dict[str, Any]]) -> None:
+        """Wait for request and token budget; TPM counts prompt size plus max_tokens"""
+        estimated_tokens = len(message_content[0]["text"]) // 4 + MAX_OUTPUT_TOKENS
+        if len(message_content) > 1:
+            estimated_tokens += VISION_IMAGE_TOKENS
+        if self._request_limiter:
+            await self._request_limiter.acquire()
+        if self._token_limiter:
+            await self._token_limiter.acquire(estimated_tokens)
+
+    def _cache_key(self, context: str, screenshot: str, model: str,
+                   include_responsive: bool, include_interactions: bool) -> str:
+        """Hash every input that affects the generated HTML"""
+        key = hashlib.blake2b(digest_size=16, usedforsecurity=False)
+        key.update(f"{model}|{include_responsive}|{include_interactions}\0".encode())
+        key.update(context.encode())
+        key.update(b"\0")
+        key.update(screenshot.encode("ascii"))
+        return key.hexdigest()
+
+    def _screenshot_data_url(self, scraped_data: ScrapedData) -> str:
+        """Return the screenshot as a data URL, reusing it if already formatted"""
+        screenshot = scraped_data.screenshot
+        if screenshot.startswith("data:"):
+            return screenshot
+        return f"data:image/{scraped_data.screenshot_format};base64,{screenshot}"
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4)
+    def _create_system_prompt(include_responsive: bool, include_interactions: bool) -> str:
+        """Create system prompt for AI; there are only four flag combinations, so each is built once"""
         prompt = """You are a helpful AI web developer assistant. Your task is to recreate a simple, static HTML version of a public web page for educational and non-commercial purposes.
 
     The goal is to help a student learn about HTML structure, CSS layout, and responsive design by analyzing existing pages.
@@ -227,40 +707,115 @@ class LLMCloner:
 
         return prompt
 
-    def _build_context(self, scraped_data: Dict[str, Any]) -> str:
+    def _build_minimal_context(self, scraped_data: ScrapedData) -> str:
+        """Build a short context for requests that include a screenshot"""
+        return f"URL: {scraped_data.url}\nTitle: {scraped_data.title}"
+
+    def _build_context(self, scraped_data: ScrapedData) -> str:
         """Build context for AI model"""
+        structure = scraped_data.structure
+        images = scraped_data.assets.images
+        features = ', '.join(name for key, name in LAYOUT_FEATURES if getattr(structure, key))
+
         context_parts = [
-            f"URL: {scraped_data.get('url', 'N/A')}",
-            f"Title: {scraped_data.get('title', 'N/A')}"
+            f"URL: {scraped_data.url}",
+            f"Title: {scraped_data.title}"
         ]
-        
-        structure = scraped_data.get('structure', {})
-        if structure.get('h1'):
-            context_parts.append(f"Main heading: {structure['h1']}")
-        
-        features = []
-        if structure.get('navigation'): features.append("Navigation")
-        if structure.get('footer'): features.append("Footer")
-        if structure.get('sidebar'): features.append("Sidebar")
-        
+        if structure.h1:
+            context_parts.append(f"Main heading: {structure.h1}")
         if features:
-            context_parts.append(f"Layout features: {', '.join(features)}")
-        
-        images = scraped_data.get('assets', {}).get('images', [])
+            context_parts.append(f"Layout features: {features}")
         if images:
             context_parts.append(f"Contains {len(images)} images")
         
         return "\n".join(context_parts)
     
+    async def _clean_html_stream(self, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Streaming counterpart of _clean_html.
+
+        Output that opens with markup or a code fence is cleaned as it arrives; anything else,
+        such as a preamble before the fence, is buffered and cleaned in one go at the end.
+        Markup output is assumed not to contain fences further down.
+        """
+        chunks = aiter(chunks)
+        buffer = ""
+        async for text in chunks:
+            buffer += text
+            opening = self._open_html_stream(buffer)
+            if opening is not None:
+                break
+        else:
+            yield self._clean_html(buffer)
+            return
+        
+        mode, pending = opening
+        if mode == "text":
+            async for text in chunks:
+                buffer += text
+            yield self._clean_html(buffer)
+            return
+        
+        fenced = mode == "fence"
+        started = False
+        while True:
+            if fenced:
+                end = pending.find("```")
+                if end >= 0:
+                    pending = pending[:end]
+                    # Trailing text after the closing fence is dropped
+                    async for _ in chunks:
+                        pass
+                    break
+            if not started and len(pending.lstrip()) >= len("<!DOCTYPE"):
+                pending, started = self._add_doctype(pending, fenced), True
+            if started:
+                # Hold back trailing whitespace and, inside a fence, a possibly partial closing fence
+                cut = len(pending[:len(pending) - 2 if fenced else None].rstrip())
+                if cut:
+                    yield pending[:cut]
+                    pending = pending[cut:]
+            text = await anext(chunks, None)
+            if text is None:
+                break
+            pending += text
+        
+        if not started:
+            pending = self._add_doctype(pending, fenced)
+        if pending.rstrip():
+            yield pending.rstrip()
+
+    @staticmethod
+    def _open_html_stream(buffer: str) -> Optional[Tuple[str, str]]:
+        """Classify the start of a completion as ("markup" | "fence" | "text", body), or None if more output is needed"""
+        head = buffer.lstrip()
+        if not head:
+            return None
+        if head.startswith("<"):
+            return "markup", buffer
+        if head.startswith("```html"):
+            return "fence", head[len("```html"):]
+        if "```html".startswith(head):
+            return None
+        if head.startswith("```"):
+            return "fence", head[len("```"):]
+        return "text", buffer
+
+    @staticmethod
+    def _add_doctype(html_content: str, fenced: bool) -> str:
+        """Prefix a DOCTYPE the way _clean_html does; fenced content is stripped first"""
+        stripped = html_content.lstrip()
+        if stripped.startswith('<!DOCTYPE'):
+            return stripped
+        return '<!DOCTYPE html>\n' + (stripped if fenced else html_content)
+
     def _clean_html(self, html_content: str) -> str:
         """Clean HTML response"""
         # Remove markdown formatting
-        if "```html" in html_content:
-            match = re.search(r'```html(.*?)```', html_content, re.DOTALL)
-            if match:
-                html_content = match.group(1).strip()
-        elif "```" in html_content:
-            match = re.search(r'```(.*?)```', html_content, re.DOTALL)
+        if "```" in html_content:
+            match = (
+                _HTML_FENCE_RE.search(html_content) or _FENCE_RE.search(html_content)
+                or _OPEN_FENCE_RE.match(html_content)
+            )
             if match:
                 html_content = match.group(1).strip()
         
@@ -274,25 +829,67 @@ class LLMCloner:
 scraper = WebScraper()
 cloner = LLMCloner()
 
+def _etag(data: bytes) -> str:
+    """Strong ETag derived from the given bytes"""
+    return '"' + hashlib.blake2b(data, digest_size=16, usedforsecurity=False).hexdigest() + '"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match list (or "*") against our ETag, per RFC 9110"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def _conditional_response(http_request: Request, payload: Dict[str, Any], etag: str, cache_control: str) -> Response:
+    """Return payload with caching headers, or an empty 304 (412 for unsafe methods) if the client already holds this ETag"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _etag_matches(http_request.headers.get("if-none-match"), etag):
+        if http_request.method in ("GET", "HEAD"):
+            return Response(status_code=304, headers=headers)
+        return Response(status_code=412, headers=headers)
+    return ORJSONResponse(payload, headers=headers)
+
 @app.post("/scrape")
-async def scrape_website(request: ScrapeRequest):
+async def scrape_website(request: ScrapeRequest, http_request: Request, no_cache: bool = False):
     """Scrape website and extract data"""
     try:
-        logger.info(f"Scraping: {request.url}")
-        result = await scraper.scrape_website(request)
-        return result
+        logger.info("Scraping: %s", request.url)
+        result = await scraper.scrape_website(request, use_cache=not no_cache)
+        # Same request served from the same scrape gets the same tag until the cache entry expires
+        etag = _etag(f"{request.model_dump_json()}|{result['timestamp']}|{result['screenshot_id']}".encode())
+        return _conditional_response(http_request, result, etag, SCRAPE_CACHE_CONTROL)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Scrape error: {e}")
+        logger.error("Scrape error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+def _attach_cached_screenshot(scraped_data: ScrapedData) -> ScrapedData:
+    """Fill in the screenshot from the scraper's cache when the client sent only its id"""
+    if scraped_data.screenshot or not scraped_data.screenshot_id:
+        return scraped_data
+    screenshot = scraper.get_screenshot(scraped_data.screenshot_id)
+    if screenshot is None:
+        # Cloning without the image would silently degrade the result, let the client re-scrape
+        raise HTTPException(
+            status_code=410, detail=f"Screenshot {scraped_data.screenshot_id} expired, re-scrape or send it inline"
+        )
+    screenshot_bytes, screenshot_format = screenshot
+    screenshot_b64 = base64.b64encode(screenshot_bytes).decode('ascii')
+    return scraped_data.model_copy(
+        update={"screenshot": f"data:image/{screenshot_format};base64,{screenshot_b64}"}
+    )
+
 @app.post("/clone")
 async def clone_website(request: CloneRequest):
     """Generate HTML using AI"""
     try:
-        logger.info(f"Cloning with model: {request.model}")
+        logger.info("Cloning with model: %s", request.model)
         
-        html_content = await cloner.clone_website(
-            request.scraped_data, 
+        scraped_data = _attach_cached_screenshot(request.scraped_data)
+        html_content, context_length = await cloner.clone_website(
+            scraped_data, 
             request.model,
             request.include_responsive,
             request.include_interactions
@@ -303,40 +900,155 @@ async def clone_website(request: CloneRequest):
             "model_used": request.model,
             "html_content": html_content,
             "processing_info": {
-                "context_length": len(str(request.scraped_data)),
-                "has_screenshot": bool(request.scraped_data.get("screenshot")),
-                "images_processed": len(request.scraped_data.get("assets", {}).get("images", []))
+                "context_length": context_length,
+                "has_screenshot": bool(scraped_data.screenshot),
+                "images_processed": len(scraped_data.assets.images)
             },
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Clone error: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/clone/stream")
+async def clone_website_stream(request: CloneRequest):
+    """Stream generated HTML as the model writes it"""
+    logger.info("Streaming clone with model: %s", request.model)
+    
+    scraped_data = _attach_cached_screenshot(request.scraped_data)
+    chunks = await cloner.open_clone_stream(
+        scraped_data,
+        request.model,
+        request.include_responsive,
+        request.include_interactions
+    )
+    return StreamingResponse(chunks, media_type="text/html")
+
+@app.post("/scrape-and-clone")
+async def scrape_and_clone(request: ScrapeAndCloneRequest, include_screenshot: bool = False):
+    """Scrape a website and generate its clone in a single call"""
+    try:
+        logger.info("Scraping and cloning: %s", request.url)
+        scraped_data = await scraper.scrape_website(request)
+        html_content, _ = await cloner.clone_website(
+            ScrapedData(**scraped_data),
+            request.model,
+            request.include_responsive,
+            request.include_interactions
+        )
+        
+        # The screenshot was only needed by the model; don't echo megabytes back
+        if not include_screenshot:
+            scraped_data = {k: v for k, v in scraped_data.items() if k != "screenshot"}
+        
+        return {
+            "status": "success",
+            "model_used": request.model,
+            "html_content": html_content,
+            "scraped_data": scraped_data,
+            "timestamp": now_iso()
         }
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Clone error: {e}")
+        logger.error("Scrape-and-clone error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _batch_scrape(body: Dict[str, Any]) -> Dict[str, Any]:
+    return await scraper.scrape_website(ScrapeRequest(**body))
+
+async def _batch_clone(body: Dict[str, Any]) -> Dict[str, Any]:
+    return await clone_website(CloneRequest(**body))
+
+BATCH_OPERATIONS = {"scrape": _batch_scrape, "clone": _batch_clone}
+
+def _batch_response(op_id: str, result: Any) -> Dict[str, Any]:
+    """Encode one batched operation's result or exception as {id, status, body}"""
+    if isinstance(result, HTTPException):
+        return {"id": op_id, "status": result.status_code, "body": {"detail": result.detail}}
+    if isinstance(result, ValidationError):
+        return {"id": op_id, "status": 422, "body": {"detail": str(result)}}
+    if isinstance(result, Exception):
+        return {"id": op_id, "status": 500, "body": {"detail": str(result)}}
+    return {"id": op_id, "status": 200, "body": result}
+
+@app.post("/batch")
+async def batch(request: BatchRequest):
+    """Run several scrape/clone operations concurrently in one round-trip"""
+    results = await asyncio.gather(
+        *(BATCH_OPERATIONS[op.method](op.body) for op in request.requests),
+        return_exceptions=True
+    )
+    return {"responses": [_batch_response(op.id, result) for op, result in zip(request.requests, results)]}
+
+@app.post("/clone-batch")
+async def clone_batch(requests: Annotated[List[CloneRequest], Body(max_length=MAX_BATCH_SIZE)]):
+    """Clone several scraped sites concurrently through the shared LLM throttle"""
+    results = await asyncio.gather(
+        *(clone_website(request) for request in requests),
+        return_exceptions=True
+    )
+    return {"responses": [_batch_response(str(i), result) for i, result in enumerate(results)]}
+
+@app.get("/screenshot/{screenshot_id}")
+async def get_screenshot(screenshot_id: str):
+    """Serve a recently captured screenshot as raw image bytes"""
+    screenshot = scraper.get_screenshot(screenshot_id)
+    if screenshot is None:
+        raise HTTPException(status_code=404, detail="Screenshot not found or expired")
+    screenshot_bytes, screenshot_format = screenshot
+    # Ids are content hashes, so a given URL never changes
+    return Response(
+        content=screenshot_bytes,
+        media_type=f"image/{screenshot_format}",
+        headers={"ETag": f'"{screenshot_id}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
+HEALTH_PAYLOAD = {
+    "status": "healthy",
+    "version": "1.0.0",
+    "supported_models": SUPPORTED_MODELS
+}
+
+ROOT_PAYLOAD = {
+    "message": "AI Website Cloner API",
+    "version": "1.0.0",
+    "endpoints": {
+        "scrape": "POST /scrape",
+        "clone": "POST /clone", 
+        "clone_stream": "POST /clone/stream",
+        "scrape_and_clone": "POST /scrape-and-clone",
+        "batch": "POST /batch",
+        "clone_batch": "POST /clone-batch",
+        "screenshot": "GET /screenshot/{screenshot_id}",
+        "health": "GET /health"
+    }
+}
+
+HEALTH_ETAG = _etag(orjson.dumps(HEALTH_PAYLOAD))
+ROOT_ETAG = _etag(orjson.dumps(ROOT_PAYLOAD))
+
 @app.get("/health")
-async def health_check():
+async def health_check(http_request: Request):
     """Health check"""
-    return {
-        "status": "healthy",
-        "version": "1.0.0",
-        "supported_models": SUPPORTED_MODELS
-    }
+    return _conditional_response(http_request, HEALTH_PAYLOAD, HEALTH_ETAG, STATIC_CACHE_CONTROL)
 
 @app.get("/")
-async def root():
+async def root(http_request: Request):
     """Root endpoint"""
-    return {
-        "message": "AI Website Cloner API",
-        "version": "1.0.0",
-        "endpoints": {
-            "scrape": "POST /scrape",
-            "clone": "POST /clone", 
-            "health": "GET /health"
-        }
-    }
+    return _conditional_response(http_request, ROOT_PAYLOAD, ROOT_ETAG, STATIC_CACHE_CONTROL)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Every worker launches its own browser pool and caches, so scale workers with care
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        # Workers re-import the app, which needs an import string; works for "python main.py" and "python -m app.main"
+        module = __spec__.name if __spec__ else "main"
+        uvicorn.run(f"{module}:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
 
 
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from app.main import LLMCloner
+
+COMPLETIONS = [
+    "<!DOCTYPE html>\n<html><body>Hi</body></html>",
+    "<html><body>No doctype</body></html>",
+    "\n\n  <html><body>Leading whitespace</body></html>\n\n",
+    "```html\n<!DOCTYPE html>\n<html></html>\n```",
+    "```html\n<html><body>x</body></html>\n```\n",
+    "```html<html>x</html>```",
+    "```\n<html>bare fence</html>\n```",
+    "```HTML\n<html>upper</html>\n```",
+    "Here is the page:\n```html\n<html>x</html>\n```\nLet me know if you need changes.",
+    "Sure! <html>no fence at all</html>",
+    "```html\n<html><body>cut off by max_tokens",
+    "```html\n<p>a</p>   \n\n   ```  trailing",
+    "```html\n<p>``inline``</p>\n```",
+    "```html\n```",
+    "``",
+    "",
+]
+
+
+def _stream(completion, size):
+    async def chunks():
+        for i in range(0, len(completion), size):
+            yield completion[i:i + size]
+    return chunks()
+
+
+async def _collect(cloner, completion, size):
+    return "".join([part async for part in cloner._clean_html_stream(_stream(completion, size))])
+
+
+@pytest.mark.parametrize("completion", COMPLETIONS)
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8, 1000])
+def test_clean_html_stream_matches_clean_html(completion, size):
+    cloner = LLMCloner()
+    assert asyncio.run(_collect(cloner, completion, size)) == cloner._clean_html(completion)
+
+
+def test_clean_html_unwraps_fences():
+    cloner = LLMCloner()
+    assert cloner._clean_html("```html<html>x</html>```") == "<!DOCTYPE html>\n<html>x</html>"
+    assert cloner._clean_html("Here:\n```html\n<html>x</html>\n```\nDone") == "<!DOCTYPE html>\n<html>x</html>"
+    assert cloner._clean_html("```html\n<html>cut") == "<!DOCTYPE html>\n<html>cut"